@@ -0,0 +1,41 @@
+from bisect import bisect_left, bisect_right
+
+SEPARATOR = '\n'
+LAST_CHARACTER = '\U0010ffff'
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е')
+
+
+class NameIndex:
+    def __init__(self, rows):
+        entries = sorted(
+            (normalize(row['name']), row['id']) for row in rows.values()
+        )
+        self.rows = rows
+        self.keys = [key for key, _ in entries]
+        self.ids = [pk for _, pk in entries]
+        self.starts = []
+        position = 0
+        for key in self.keys:
+            self.starts.append(position)
+            position += len(key) + len(SEPARATOR)
+        self.text = SEPARATOR.join(self.keys)
+
+    def search(self, query, limit):
+        query = normalize(query.strip())
+        if not query or SEPARATOR in query:
+            return []
+        start = bisect_left(self.keys, query)
+        end = bisect_left(self.keys, query + LAST_CHARACTER, start)
+        found = self.ids[start:min(end, start + limit)]
+        position = self.text.find(query)
+        while position != -1 and len(found) < limit:
+            index = bisect_right(self.starts, position) - 1
+            if not start <= index < end:
+                found.append(self.ids[index])
+            if index + 1 == len(self.starts):
+                break
+            position = self.text.find(query, self.starts[index + 1])
+        return [self.rows[pk] for pk in found]
@@ -0,0 +1,142 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import quote_etag, urlencode
+
+from recipes.models import Cart, Favorite, Subscribe
+
+RECIPES_VERSION_KEY = 'recipes:version'
+USER_VERSION_KEY = 'recipes:user:{}:version'
+LIST_KEY = 'recipes:{}:list:{}'
+DETAIL_KEY = 'recipes:{}:detail:{}:{}:{}'
+FLAGS_KEY = 'recipes:flags:{}:{}:{}'
+LIST_PARAMS = (
+    'tags', 'author', 'page', 'limit', 'cursor', 'ordering', 'search'
+)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def increment_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_version(key):
+    transaction.on_commit(lambda: increment_version(key))
+
+
+def bump_recipes_version():
+    bump_version(RECIPES_VERSION_KEY)
+
+
+def bump_user_version(user_id):
+    bump_version(USER_VERSION_KEY.format(user_id))
+
+
+def get_list_key(request):
+    params = request.query_params
+    if any(name not in LIST_PARAMS for name in params):
+        return None
+    query = urlencode(
+        sorted(
+            (name, sorted(set(params.getlist(name))))
+            for name in LIST_PARAMS if name in params
+        ),
+        doseq=True
+    )
+    digest = hashlib.md5(
+        f'{request.scheme}://{request.get_host()}?{query}'.encode()
+    ).hexdigest()
+    return LIST_KEY.format(get_version(RECIPES_VERSION_KEY), digest)
+
+
+def get_detail_key(request, pk):
+    return DETAIL_KEY.format(
+        get_version(RECIPES_VERSION_KEY), request.scheme, request.get_host(),
+        pk
+    )
+
+
+def get_etag(request, *versions):
+    return quote_etag(hashlib.md5(':'.join(map(str, (
+        *versions, request.accepted_renderer.format,
+        request.build_absolute_uri()
+    ))).encode()).hexdigest())
+
+
+def get_recipes_etag(request):
+    user = request.user
+    user_version = None
+    if user.is_authenticated:
+        user_version = get_version(USER_VERSION_KEY.format(user.id))
+    return get_etag(
+        request,
+        get_version(RECIPES_VERSION_KEY),
+        user.id,
+        user_version
+    )
+
+
+def get_recipes(data):
+    if 'results' in data:
+        return data['results']
+    return [data]
+
+
+def reset_user_flags(data):
+    for recipe in get_recipes(data):
+        recipe['is_favorited'] = False
+        recipe['is_in_shopping_cart'] = False
+        recipe['author']['is_subscribed'] = False
+    return data
+
+
+def get_user_flags(user, key, recipes):
+    flags_key = FLAGS_KEY.format(
+        user.id, get_version(USER_VERSION_KEY.format(user.id)), key
+    )
+    flags = cache.get(flags_key)
+    if flags is None:
+        recipe_ids = [recipe['id'] for recipe in recipes]
+        author_ids = {recipe['author']['id'] for recipe in recipes}
+        flags = {
+            'is_favorited': set(Favorite.objects.filter(
+                user=user, recipe__in=recipe_ids
+            ).values_list('recipe_id', flat=True)),
+            'is_in_shopping_cart': set(Cart.objects.filter(
+                user=user, recipe__in=recipe_ids
+            ).values_list('recipe_id', flat=True)),
+            'is_subscribed': set(Subscribe.objects.filter(
+                user=user, following__in=author_ids
+            ).values_list('following_id', flat=True)),
+        }
+        cache.set(flags_key, flags, settings.RECIPES_CACHE_TIMEOUT)
+    return flags
+
+
+def apply_user_flags(data, user, key):
+    if user.is_anonymous:
+        return data
+    recipes = get_recipes(data)
+    flags = get_user_flags(user, key, recipes)
+    for recipe in recipes:
+        recipe['is_favorited'] = recipe['id'] in flags['is_favorited']
+        recipe['is_in_shopping_cart'] = (
+            recipe['id'] in flags['is_in_shopping_cart']
+        )
+        recipe['author']['is_subscribed'] = (
+            recipe['author']['id'] in flags['is_subscribed']
+        )
+    return data
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+
+from recipes.models import FeedItem, Recipe, Subscribe
+from users.models import User
+from .pagination import keyset_filter
+
+FEED_ORDERING = ('-pub_date', '-recipe_id')
+RECIPE_ORDERING = ('-pub_date', '-id')
+
+
+def is_read_on_demand(author_id):
+    return User.objects.filter(id=author_id, feed_on_read=True).exists()
+
+
+def has_many_followers(author_id):
+    return Subscribe.objects.filter(
+        following_id=author_id
+    ).values('id')[settings.FEED_FANOUT_LIMIT:].exists()
+
+
+def mark_read_on_demand():
+    User.objects.filter(feed_on_read=True).update(feed_on_read=False)
+    User.objects.filter(
+        id__in=Subscribe.objects.values('following').annotate(
+            followers=Count('id')
+        ).filter(
+            followers__gt=settings.FEED_FANOUT_LIMIT
+        ).values('following')
+    ).update(feed_on_read=True)
+
+
+def fan_out(recipe):
+    if is_read_on_demand(recipe.author_id):
+        return
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(
+                user_id=user_id, recipe_id=recipe.id,
+                pub_date=recipe.pub_date
+            )
+            for user_id in Subscribe.objects.filter(
+                following_id=recipe.author_id
+            ).values_list('user_id', flat=True)
+        ],
+        ignore_conflicts=True
+    )
+    FeedItem.objects.filter(
+        id__in=Subscribe.objects.filter(
+            following_id=recipe.author_id
+        ).annotate(overflow=Subquery(
+            FeedItem.objects.filter(user=OuterRef('user')).order_by(
+                *FEED_ORDERING
+            ).values('id')[settings.FEED_SIZE:settings.FEED_SIZE + 1]
+        )).values('overflow')
+    ).delete()
+
+
+def backfill(subscribe):
+    if is_read_on_demand(subscribe.following_id):
+        return
+    if has_many_followers(subscribe.following_id):
+        User.objects.filter(id=subscribe.following_id).update(
+            feed_on_read=True
+        )
+        return
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(
+                user_id=subscribe.user_id, recipe_id=recipe_id,
+                pub_date=pub_date
+            )
+            for recipe_id, pub_date in Recipe.objects.filter(
+                author_id=subscribe.following_id
+            ).order_by(*RECIPE_ORDERING).values_list(
+                'id', 'pub_date'
+            )[:settings.FEED_SIZE]
+        ],
+        ignore_conflicts=True
+    )
+    trim(subscribe.user_id)
+
+
+def remove(subscribe):
+    FeedItem.objects.filter(
+        user_id=subscribe.user_id,
+        recipe__author_id=subscribe.following_id
+    ).delete()
+
+
+def trim(user):
+    items = FeedItem.objects.filter(user=user)
+    boundary = list(
+        items.order_by(*FEED_ORDERING).values_list(
+            'pub_date', 'recipe_id'
+        )[settings.FEED_SIZE - 1:settings.FEED_SIZE + 1]
+    )
+    if len(boundary) > 1:
+        items.filter(keyset_filter(FEED_ORDERING, boundary[0])).delete()
+
+
+def get_feed(user, position, size):
+    items = FeedItem.objects.filter(user=user)
+    authors = list(
+        Subscribe.objects.filter(
+            user=user, following__feed_on_read=True
+        ).values_list('following_id', flat=True)
+    )
+    recipes = Recipe.objects.filter(author_id__in=authors)
+    if position is not None:
+        items = items.filter(keyset_filter(FEED_ORDERING, position))
+        recipes = recipes.filter(keyset_filter(RECIPE_ORDERING, position))
+    entries = list(
+        items.order_by(*FEED_ORDERING).values_list(
+            'pub_date', 'recipe_id'
+        )[:size]
+    )
+    if not authors:
+        return entries
+    return sorted(
+        set(entries) | set(
+            recipes.order_by(*RECIPE_ORDERING).values_list(
+                'pub_date', 'id'
+            )[:size]
+        ),
+        reverse=True
+    )[:size]
@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+NOT_AN_IMAGE = 'Загрузите изображение в формате PNG, JPEG, GIF или WebP'
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+HEADER_SIZE = 12
+
+
+def get_image_extension(header):
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    for signature, extension in SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    return None
+
+
+class RecipeImageField(Base64ImageField):
+    def to_internal_value(self, data):
+        if not isinstance(data, UploadedFile):
+            return super().to_internal_value(data)
+        data.seek(0)
+        extension = get_image_extension(data.read(HEADER_SIZE))
+        data.seek(0)
+        if extension is None:
+            raise serializers.ValidationError(NOT_AN_IMAGE)
+        data.name = f'{uuid4()}.{extension}'
+        return serializers.FileField.to_internal_value(self, data)
@@ -1,20 +1,30 @@
 import django_filters
 from django_filters import FilterSet
-from rest_framework import filters
+from rest_framework.filters import OrderingFilter
 
-from recipes.models import Recipe
+from recipes.models import Recipe, Tag
+from . import search
+
+SEARCH_ORDERING = ('-rank', '-pub_date', '-id')
 
 
 class RecipeFilter(FilterSet):
     is_favorited = django_filters.NumberFilter(method='get_is_favorited')
-    tags = django_filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = django_filters.ModelMultipleChoiceFilter(
+        field_name='tags__slug',
+        to_field_name='slug',
+        queryset=Tag.objects.all()
+    )
     is_in_shopping_cart = django_filters.NumberFilter(
         method='get_is_in_shopping_cart'
     )
+    search = django_filters.CharFilter(method='get_search')
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'is_favorited', 'is_in_shopping_cart', 'search'
+        )
 
     def get_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -32,6 +42,20 @@ class RecipeFilter(FilterSet):
             return queryset.exclude(recipe_in_cart__user=user)
         return queryset
 
-
-class IngredientSearchFilter(filters.SearchFilter):
-    search_param = 'name'
+    def get_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search.search(queryset, value).order_by(*SEARCH_ORDERING)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    def get_ordering(self, request, queryset, view):
+        if (
+            self.ordering_param not in request.query_params
+            and request.query_params.get('search', '').strip()
+        ):
+            return None
+        ordering = list(super().get_ordering(request, queryset, view))
+        if ordering[-1].lstrip('-') != 'id':
+            ordering.append('-id')
+        return ordering
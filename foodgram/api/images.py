@@ -0,0 +1,136 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes.models import Recipe
+from .cache import bump_recipes_version
+
+logger = logging.getLogger('api.images')
+
+VARIANT_PATH = 'variants/{}_{}.{}'
+VARIANTS = (
+    ('thumbnail', (160, 160), 'JPEG', 'jpg'),
+    ('card', (640, 480), 'JPEG', 'jpg'),
+    ('webp', (640, 480), 'WEBP', 'webp'),
+)
+QUALITY = 85
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.IMAGE_WORKERS,
+        thread_name_prefix='images'
+    )
+
+
+def get_variant_name(name, variant, extension):
+    return VARIANT_PATH.format(
+        os.path.splitext(os.path.basename(name))[0], variant, extension
+    )
+
+
+def get_variant_names(name):
+    return {
+        variant: get_variant_name(name, variant, extension)
+        for variant, _, _, extension in VARIANTS
+    }
+
+
+def get_variant_urls(recipe, request=None):
+    if not recipe.has_image_variants:
+        return None
+    urls = {}
+    for variant, name in get_variant_names(recipe.image.name).items():
+        url = default_storage.url(name)
+        urls[variant] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def render_variant(image, size, format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        variant = variant.convert('RGB')
+    buffer = BytesIO()
+    variant.save(buffer, format, quality=QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def render_variants(name):
+    storage = Recipe.image.field.storage
+    with storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    for variant, size, format, extension in VARIANTS:
+        variant_name = get_variant_name(name, variant, extension)
+        default_storage.delete(variant_name)
+        default_storage.save(
+            variant_name, ContentFile(render_variant(image, size, format))
+        )
+
+
+def process(recipe_id, name):
+    try:
+        if not all(
+            default_storage.exists(variant_name)
+            for variant_name in get_variant_names(name).values()
+        ):
+            render_variants(name)
+        if Recipe.objects.filter(id=recipe_id, image=name).update(
+            has_image_variants=True
+        ):
+            bump_recipes_version()
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+
+
+def run_in_worker(function, *args):
+    try:
+        function(*args)
+    finally:
+        connection.close()
+
+
+def is_referenced(name):
+    return Recipe.objects.filter(image=name).exists()
+
+
+def is_expired(storage, name, min_age):
+    return not storage.exists(name) or (
+        timezone.now() - storage.get_modified_time(name)
+    ).total_seconds() >= min_age
+
+
+def remove(name):
+    Recipe.image.field.storage.delete(name)
+    for variant_name in get_variant_names(name).values():
+        default_storage.delete(variant_name)
+
+
+def release(name):
+    if not is_referenced(name) and is_expired(
+        Recipe.image.field.storage, name, settings.IMAGE_RELEASE_MIN_AGE
+    ):
+        remove(name)
+
+
+def schedule(recipe):
+    transaction.on_commit(lambda: get_executor().submit(
+        run_in_worker, process, recipe.id, recipe.image.name
+    ))
+
+
+def schedule_release(name):
+    transaction.on_commit(lambda: get_executor().submit(
+        run_in_worker, release, name
+    ))
@@ -0,0 +1,253 @@
+import gc
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Cart, Favorite, Ingredient, Recipe, Subscribe, Tag
+from users.models import User
+
+NO_DATA = 'Заполните базу командами uploadDB и generateDB'
+REGRESSIONS = 'Превышен бюджет:\n{}'
+SEARCH_QUERY = 'соль'
+BATCH_SIZE = 10
+DEFAULT_BASELINE = os.path.join(
+    settings.BASE_DIR, 'data/benchmark_baseline.json'
+)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Замер задержки, числа запросов и памяти для эндпоинтов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--update-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.5)
+        parser.add_argument('--slack-ms', type=float, default=5)
+        parser.add_argument('--slack-kb', type=float, default=64)
+        parser.add_argument('--cold', action='store_true')
+
+    def handle(self, *args, **options):
+        self.options = options
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if '*' not in host),
+            'localhost'
+        )
+        self.anonymous = Client(HTTP_HOST=host)
+        user = self.get_user()
+        self.client = Client(
+            HTTP_HOST=host,
+            HTTP_AUTHORIZATION=(
+                f'Token {Token.objects.get_or_create(user=user)[0].key}'
+            )
+        )
+        results = {}
+        for name, client, requests in self.get_scenarios(user):
+            results.update(self.measure(name, client, requests))
+        self.report(results)
+
+    def get_user(self):
+        user = User.objects.annotate(
+            subscriptions=Count('follower', distinct=True),
+            carts=Count('cart', distinct=True)
+        ).filter(subscriptions__gt=0, carts__gt=0).order_by(
+            '-subscriptions', 'id'
+        ).first()
+        if user is None or not Ingredient.objects.exists():
+            raise CommandError(NO_DATA)
+        return user
+
+    def get_scenarios(self, user):
+        recipe = Recipe.objects.order_by('-id').first()
+        author = Subscribe.objects.filter(user=user).order_by(
+            'id'
+        ).values_list('following_id', flat=True).first()
+        tag = Tag.objects.order_by('id').first()
+        ingredient = Ingredient.objects.order_by('id').first()
+        favorite = Recipe.objects.exclude(
+            id__in=Favorite.objects.filter(user=user).values('recipe_id')
+        ).order_by('id').first()
+        cart = Recipe.objects.exclude(
+            id__in=Cart.objects.filter(user=user).values('recipe_id')
+        ).order_by('id').first()
+        batch = list(Recipe.objects.exclude(
+            id__in=Favorite.objects.filter(user=user).values('recipe_id')
+        ).exclude(
+            id__in=Cart.objects.filter(user=user).values('recipe_id')
+        ).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+        followed = User.objects.exclude(id=user.id).exclude(
+            id__in=Subscribe.objects.filter(user=user).values('following_id')
+        ).order_by('id').first()
+        anonymous, client = self.anonymous, self.client
+        return (
+            ('recipes anonymous', anonymous,
+             [('get', '/api/recipes/')]),
+            ('recipes', client, [('get', '/api/recipes/')]),
+            ('recipes limit=60', client,
+             [('get', '/api/recipes/?limit=60')]),
+            ('recipes page=50', client,
+             [('get', '/api/recipes/?page=50')]),
+            ('recipes by tag', client,
+             [('get', f'/api/recipes/?tags={tag.slug}')]),
+            ('recipes by author', client,
+             [('get', f'/api/recipes/?author={author}')]),
+            ('recipes favorited', client,
+             [('get', '/api/recipes/?is_favorited=1')]),
+            ('recipes in cart', client,
+             [('get', '/api/recipes/?is_in_shopping_cart=1')]),
+            ('recipes search', client,
+             [('get', f'/api/recipes/?search={quote(SEARCH_QUERY)}')]),
+            ('feed', client, [('get', '/api/recipes/feed/')]),
+            ('recipe detail', client,
+             [('get', f'/api/recipes/{recipe.id}/')]),
+            ('subscriptions', client,
+             [('get', '/api/users/subscriptions/?recipes_limit=3')]),
+            ('users', client, [('get', '/api/users/')]),
+            ('user detail', client, [('get', f'/api/users/{author}/')]),
+            ('me', client, [('get', '/api/users/me/')]),
+            ('tags', anonymous, [('get', '/api/tags/')]),
+            ('tag detail', anonymous, [('get', f'/api/tags/{tag.id}/')]),
+            ('ingredients', anonymous, [('get', '/api/ingredients/')]),
+            ('ingredient search', anonymous,
+             [('get', '/api/ingredients/?name=мол')]),
+            ('ingredient detail', anonymous,
+             [('get', f'/api/ingredients/{ingredient.id}/')]),
+            ('favorite toggle', client, [
+                ('post', f'/api/recipes/{favorite.id}/favorite/'),
+                ('delete', f'/api/recipes/{favorite.id}/favorite/'),
+            ]),
+            ('cart toggle', client, [
+                ('post', f'/api/recipes/{cart.id}/shopping_cart/'),
+                ('delete', f'/api/recipes/{cart.id}/shopping_cart/'),
+            ]),
+            ('favorite batch', client, [
+                ('post', '/api/recipes/favorite/batch/', {'recipes': batch}),
+                ('delete', '/api/recipes/favorite/batch/',
+                 {'recipes': batch}),
+            ]),
+            ('cart batch', client, [
+                ('post', '/api/recipes/shopping_cart/batch/',
+                 {'recipes': batch}),
+                ('delete', '/api/recipes/shopping_cart/batch/',
+                 {'recipes': batch}),
+            ]),
+            ('subscribe toggle', client, [
+                ('post', f'/api/users/{followed.id}/subscribe/'),
+                ('delete', f'/api/users/{followed.id}/subscribe/'),
+            ]),
+            ('download pdf', client,
+             [('get', '/api/recipes/download_shopping_cart/')]),
+            ('download txt', client,
+             [('get', '/api/recipes/download_shopping_cart/?format=txt')]),
+        )
+
+    def request(self, client, method, path, data=None):
+        if self.options['cold']:
+            cache.clear()
+        if data is None:
+            response = getattr(client, method)(path)
+        else:
+            response = getattr(client, method)(
+                path, json.dumps(data), content_type='application/json'
+            )
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method.upper()} {path}: {response.status_code}'
+            )
+
+    def measure(self, name, client, requests):
+        keys = [
+            name if len(requests) == 1 else f'{name} {method}'
+            for method, *_ in requests
+        ]
+        timings = {key: [] for key in keys}
+        queries = dict.fromkeys(keys, 0)
+        memory = {}
+        gc.collect()
+        for request in requests:
+            self.request(client, *request)
+        for _ in range(self.options['repeat']):
+            for key, request in zip(keys, requests):
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    self.request(client, *request)
+                    timings[key].append(time.perf_counter() - start)
+                queries[key] = max(
+                    queries[key], len(context.captured_queries)
+                )
+        for key, request in zip(keys, requests):
+            tracemalloc.start()
+            self.request(client, *request)
+            memory[key] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return {
+            key: {
+                'p50_ms': round(statistics.median(timings[key]) * 1000, 2),
+                'p95_ms': round(percentile(timings[key], 0.95) * 1000, 2),
+                'queries': queries[key],
+                'memory_kb': round(memory[key] / 1024, 1),
+            }
+            for key in keys
+        }
+
+    def report(self, results):
+        baseline = {}
+        if os.path.exists(self.options['baseline']):
+            with open(self.options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        tolerance = 1 + self.options['tolerance']
+        regressions = []
+        self.stdout.write(
+            f'{"эндпоинт":<28}{"p50 мс":>9}{"p95 мс":>9}'
+            f'{"запросы":>9}{"КБ":>9}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<28}{result["p50_ms"]:>9}{result["p95_ms"]:>9}'
+                f'{result["queries"]:>9}{result["memory_kb"]:>9}'
+            )
+            budget = baseline.get(name)
+            if budget is None:
+                continue
+            if result['queries'] > budget['queries']:
+                regressions.append(
+                    f'{name}: запросов {result["queries"]} > '
+                    f'{budget["queries"]}'
+                )
+            for metric, slack in (
+                ('p95_ms', self.options['slack_ms']),
+                ('memory_kb', self.options['slack_kb']),
+            ):
+                limit = round(budget[metric] * tolerance + slack, 2)
+                if result[metric] > limit:
+                    regressions.append(
+                        f'{name}: {metric} {result[metric]} > {limit}'
+                    )
+        if self.options['update_baseline']:
+            with open(
+                self.options['baseline'], 'w', encoding='utf-8'
+            ) as file:
+                json.dump(results, file, ensure_ascii=False, indent=4)
+            return
+        if regressions:
+            raise CommandError(REGRESSIONS.format('\n'.join(regressions)))
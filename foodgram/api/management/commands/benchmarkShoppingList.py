@@ -0,0 +1,49 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from api.shopping_list import register_font, render_pdf
+
+
+def make_shopping_list(size):
+    return [
+        (f'ингредиент {i}', 'г', i * 10)
+        for i in range(1, size + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Замер времени и памяти при выгрузке списка покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[10, 100, 1000]
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5
+        )
+
+    def handle(self, *args, **options):
+        register_font()
+        for size in options['sizes']:
+            shopping_list = make_shopping_list(size)
+            timings = []
+            for _ in range(options['repeat']):
+                tracemalloc.start()
+                start = time.perf_counter()
+                length = sum(len(chunk) for chunk in render_pdf(shopping_list))
+                timings.append(time.perf_counter() - start)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.stdout.write(
+                f'{size:>6} ингредиентов: '
+                f'{min(timings) * 1000:.1f} мс, '
+                f'{length / 1024:.1f} КБ, '
+                f'пик памяти {peak / 1024:.1f} КБ'
+            )
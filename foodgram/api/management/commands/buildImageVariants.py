@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api import images
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий изображений для старых рецептов'
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.filter(has_image_variants=False).exclude(
+            image=''
+        ).values_list('id', 'image')
+        total = 0
+        for recipe_id, name in recipes.iterator():
+            images.process(recipe_id, name)
+            total += 1
+        self.stdout.write(
+            f'Обработано: {total}, готово: '
+            f'{Recipe.objects.filter(has_image_variants=True).count()}'
+        )
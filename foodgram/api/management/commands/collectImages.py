@@ -0,0 +1,69 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from api import images
+from recipes.models import Recipe
+
+VARIANTS_DIRECTORY = os.path.dirname(images.VARIANT_PATH)
+
+
+def walk(storage, path=''):
+    directories, files = storage.listdir(path)
+    for directory in directories:
+        if path or directory != VARIANTS_DIRECTORY:
+            yield from walk(storage, os.path.join(path, directory))
+    for name in files:
+        yield os.path.join(path, name)
+
+
+def get_stem(name):
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--min-age', type=int, default=settings.IMAGE_RELEASE_MIN_AGE
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.removed = 0
+        self.size = 0
+        storage = Recipe.image.field.storage
+        referenced = set(
+            Recipe.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).distinct().iterator()
+        )
+        stems = {get_stem(name) for name in referenced}
+        for name in walk(storage):
+            if name not in referenced:
+                self.collect(storage, name)
+        if default_storage.exists(VARIANTS_DIRECTORY):
+            for name in default_storage.listdir(VARIANTS_DIRECTORY)[1]:
+                if get_stem(name).rsplit('_', 1)[0] not in stems:
+                    self.collect(
+                        default_storage,
+                        os.path.join(VARIANTS_DIRECTORY, name)
+                    )
+        self.stdout.write(
+            f'{"Будет удалено" if options["dry_run"] else "Удалено"}: '
+            f'{self.removed} файлов, {self.size / 1024 / 1024:.1f} МБ'
+        )
+
+    def collect(self, storage, name):
+        if not images.is_expired(storage, name, self.options['min_age']):
+            return
+        self.removed += 1
+        self.size += storage.size(name)
+        if self.options['verbosity'] > 1:
+            self.stdout.write(name)
+        if not self.options['dry_run']:
+            storage.delete(name)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api import plans
+from recipes.models import Cart, Recipe, Tag
+from users.models import User
+
+NO_DATA = 'Заполните базу командами uploadDB и generateDB'
+SEQUENTIAL_SCANS = 'Последовательное чтение больших таблиц:\n{}'
+
+
+class Command(BaseCommand):
+    help = 'Проверка планов запросов горячих фильтров на полный просмотр'
+
+    def handle(self, *args, **options):
+        if not plans.is_supported():
+            raise CommandError(f'Не поддерживается: {connection.vendor}')
+        user = Cart.objects.values_list('user', flat=True).first()
+        author = Recipe.objects.values_list('author', flat=True).first()
+        tag = Tag.objects.values_list('slug', flat=True).first()
+        if user is None or author is None or tag is None:
+            raise CommandError(NO_DATA)
+        user = User.objects.get(id=user)
+        failures = []
+        with plans.index_scans_only():
+            for name, queryset in plans.get_queries(user, author, tag):
+                plan = queryset.explain()
+                scans = plans.get_sequential_scans(plan)
+                self.stdout.write(
+                    f'{name}: {", ".join(scans) if scans else "ok"}'
+                )
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan)
+                if scans:
+                    failures.append(f'{name}: {", ".join(scans)}')
+        if failures:
+            raise CommandError(SEQUENTIAL_SCANS.format('\n'.join(failures)))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import feed
+from recipes.models import FeedItem, Subscribe
+
+
+class Command(BaseCommand):
+    help = 'Пересборка лент подписок из подписок и рецептов'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            FeedItem.objects.all().delete()
+            feed.mark_read_on_demand()
+            for subscribe in Subscribe.objects.only(
+                'user_id', 'following_id'
+            ).iterator():
+                feed.backfill(subscribe)
+        self.stdout.write(
+            f'Записей в лентах: {FeedItem.objects.count()}, '
+            f'{time.perf_counter() - start:.1f} с'
+        )
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import search
+
+IN_MEMORY = 'Поисковые векторы нужны только для PostgreSQL, пропущено'
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт поисковых векторов рецептов'
+
+    def handle(self, *args, **options):
+        if not search.is_postgresql():
+            self.stdout.write(IN_MEMORY)
+            return
+        start = time.perf_counter()
+        search.update_vectors()
+        self.stdout.write(
+            f'Поисковые векторы пересчитаны, '
+            f'{time.perf_counter() - start:.1f} с'
+        )
@@ -0,0 +1,106 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import Serializer
+
+logger = logging.getLogger('api.profiling')
+local = threading.local()
+
+
+class Profile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = Counter()
+        self.sql_time = 0
+        self.serializers = Counter()
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries[sql] += 1
+
+    def get_duplicates(self):
+        return {sql: count for sql, count in self.queries.items() if count > 1}
+
+    def get_server_timing(self, duration):
+        metrics = [
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={self.sql_time * 1000:.1f};'
+            f'desc="{sum(self.queries.values())} queries, '
+            f'{len(self.get_duplicates())} duplicated"',
+        ]
+        metrics.extend(
+            f'ser-{name};dur={seconds * 1000:.1f}'
+            for name, seconds in self.serializers.most_common()
+        )
+        return ', '.join(metrics)
+
+
+def profile_to_representation(to_representation):
+    @wraps(to_representation)
+    def wrapper(self, instance):
+        profile = getattr(local, 'profile', None)
+        if profile is None:
+            return to_representation(self, instance)
+        start = time.perf_counter()
+        try:
+            return to_representation(self, instance)
+        finally:
+            profile.serializers[type(self).__name__] += (
+                time.perf_counter() - start
+            )
+    wrapper.profiled = True
+    return wrapper
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        if not getattr(Serializer.to_representation, 'profiled', False):
+            Serializer.to_representation = profile_to_representation(
+                Serializer.to_representation
+            )
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = local.profile = Profile()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            local.profile = None
+        duration = time.perf_counter() - profile.start
+        response['Server-Timing'] = profile.get_server_timing(duration)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'queries': sum(profile.queries.values()),
+            'sql_ms': round(profile.sql_time * 1000, 1),
+            'duplicates': profile.get_duplicates(),
+            'serializers_ms': {
+                name: round(seconds * 1000, 1)
+                for name, seconds in profile.serializers.items()
+            },
+        }, ensure_ascii=False))
+        return response
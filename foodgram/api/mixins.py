@@ -1,10 +1,47 @@
+from contextlib import contextmanager
+from copy import deepcopy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import CreateModelMixin, DestroyModelMixin
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
 
 from recipes.models import Recipe
+from .cache import (apply_user_flags, bump_user_version, get_detail_key,
+                    get_etag, get_list_key, get_recipes_etag,
+                    reset_user_flags)
+from .serializers import RecipeBatchSerializer
+from .signals import counters_muted
+
+ADDED = 'added'
+ALREADY_ADDED = 'exists'
+REMOVED = 'removed'
+NOT_FOUND = 'not_found'
+
+
+@contextmanager
+def unique_or_error(message):
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError:
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+
+def delete_or_404(queryset):
+    deleted, _ = queryset.delete()
+    if not deleted:
+        raise Http404
 
 
 class CreateDeleteMixins(CreateModelMixin, DestroyModelMixin, GenericViewSet):
@@ -14,20 +51,174 @@ class CreateDeleteMixins(CreateModelMixin, DestroyModelMixin, GenericViewSet):
 class CartFavorite:
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        context.update({'recipe_id': self.kwargs.get('recipe_id')})
+        context.update({'recipe': get_object_or_404(
+            Recipe.objects.only('id', 'name', 'image', 'cooking_time'),
+            id=self.kwargs.get('recipe_id')
+        )})
         return context
 
     def perform_create(self, serializer):
-        serializer.save(
-            user=self.request.user,
-            recipe=get_object_or_404(
-                Recipe, id=self.kwargs.get('recipe_id')
+        with unique_or_error(self.already_added):
+            serializer.save(
+                user=self.request.user, recipe=serializer.context['recipe']
             )
-        )
 
+    @transaction.atomic
     def delete(self, request, recipe_id):
-        get_object_or_404(
-            self.model,
-            user=request.user,
-            recipe_id=recipe_id).delete()
+        delete_or_404(
+            self.model.objects.filter(user=request.user, recipe_id=recipe_id)
+        )
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CartFavoriteBatch:
+    def get_recipe_ids(self, request):
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['recipes']))
+
+    def record_changes(self, recipe_ids, change):
+        if not recipe_ids:
+            return
+        Recipe.objects.filter(id__in=recipe_ids).change_counter(
+            self.counter, change
+        )
+        bump_user_version(self.request.user.id)
+
+    @transaction.atomic
+    def create(self, request):
+        recipe_ids = self.get_recipe_ids(request)
+        selected = dict(
+            Recipe.objects.filter(id__in=recipe_ids).annotate(
+                selected=Exists(self.model.objects.filter(
+                    user=request.user, recipe=OuterRef('pk')
+                ))
+            ).values_list('id', 'selected')
+        )
+        added = [
+            pk for pk in recipe_ids if pk in selected and not selected[pk]
+        ]
+        self.model.objects.bulk_create(
+            [self.model(user=request.user, recipe_id=pk) for pk in added],
+            ignore_conflicts=True
+        )
+        self.record_changes(added, 1)
+        return Response({'recipes': [
+            {
+                'id': pk,
+                'status': (
+                    NOT_FOUND if pk not in selected
+                    else ALREADY_ADDED if selected[pk] else ADDED
+                ),
+            }
+            for pk in recipe_ids
+        ]})
+
+    @transaction.atomic
+    def destroy(self, request):
+        recipe_ids = self.get_recipe_ids(request)
+        rows = self.model.objects.filter(
+            user=request.user, recipe_id__in=recipe_ids
+        )
+        removed = set(rows.values_list('recipe_id', flat=True))
+        if removed:
+            # Счётчики рецептов уменьшаются одним UPDATE в record_changes,
+            # поэтому построчный decrement_counter отключён. Остальные
+            # обработчики post_delete срабатывают как обычно.
+            with counters_muted():
+                rows.delete()
+        self.record_changes(removed, -1)
+        return Response({'recipes': [
+            {'id': pk, 'status': REMOVED if pk in removed else NOT_FOUND}
+            for pk in recipe_ids
+        ]})
+
+
+class ConditionalGetMixin:
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, view, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        if response.status_code not in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            return response
+        response['ETag'] = etag
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=self.max_age)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+
+class RecipeCacheMixin:
+    max_age = settings.RECIPES_MAX_AGE
+
+    def get_etag(self, request):
+        return get_recipes_etag(request)
+
+    def list(self, request, *args, **kwargs):
+        key = get_list_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(
+            key, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        key = get_detail_key(request, kwargs[self.lookup_field])
+        return self.get_cached_response(
+            key, super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, key, view, request, *args, **kwargs):
+        data = cache.get(key)
+        if data is None:
+            response = view(request, *args, **kwargs)
+            cache.set(
+                key,
+                reset_user_flags(deepcopy(response.data)),
+                settings.RECIPES_CACHE_TIMEOUT
+            )
+            return response
+        return Response(apply_user_flags(data, request.user, key))
+
+
+class ReferenceCacheMixin:
+    reference = None
+    max_age = settings.REFERENCE_MAX_AGE
+
+    def get_etag(self, request):
+        return get_etag(
+            request,
+            self.reference.name,
+            self.reference.get_snapshot()['generation']
+        )
+
+    def list(self, request, *args, **kwargs):
+        if (
+            any(value.strip() for value in request.query_params.values())
+            or request.accepted_renderer.format != 'json'
+        ):
+            return super().list(request, *args, **kwargs)
+        return HttpResponse(
+            self.reference.get_content(), content_type='application/json'
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        if not pk.isdigit():
+            raise Http404
+        return Response(self.reference.get_row_or_404(int(pk)))
@@ -1,6 +1,109 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+INVALID_CURSOR = 'Неверный курсор'
+
+
+def encode_cursor(position):
+    return urlsafe_b64encode(json.dumps([
+        value.isoformat() if isinstance(value, date) else value
+        for value in position
+    ]).encode()).decode()
+
+
+def get_ordering_fields(queryset, ordering):
+    fields = []
+    for name in ordering:
+        name = name.lstrip('-')
+        if name in queryset.query.annotations:
+            fields.append(queryset.query.annotations[name].output_field)
+            continue
+        opts = queryset.model._meta
+        *path, name = name.split('__')
+        for part in path:
+            opts = opts.get_field(part).related_model._meta
+        fields.append(opts.pk if name == 'pk' else opts.get_field(name))
+    return fields
+
+
+def decode_cursor(cursor, fields):
+    try:
+        position = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(position, list) or len(position) != len(fields):
+            raise ValueError
+        position = [
+            field.to_python(value) for field, value in zip(fields, position)
+        ]
+    except (TypeError, ValueError, ValidationError):
+        raise NotFound(INVALID_CURSOR)
+    if None in position:
+        raise NotFound(INVALID_CURSOR)
+    return position
+
+
+def keyset_filter(ordering, position):
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
 
 
 class RecipesSubscriptionsPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = request.query_params.get(self.cursor_query_param)
+        if self.cursor is None:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        ordering = queryset.query.order_by or ('-pk',)
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            queryset = queryset.filter(keyset_filter(
+                ordering, decode_cursor(
+                    self.cursor, get_ordering_fields(queryset, ordering)
+                )
+            ))
+        size = self.get_page_size(request)
+        page = list(queryset[:size + 1])
+        self.next_position = None
+        if len(page) > size:
+            page = page[:size]
+            self.next_position = [
+                attrgetter(field.lstrip('-').replace('__', '.'))(page[-1])
+                for field in ordering
+            ]
+        return page
+
+    def get_next_link(self):
+        if self.cursor is None:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor is None:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
@@ -0,0 +1,58 @@
+import json
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+TOO_LARGE = 'Файл больше {} байт'
+INVALID_JSON = 'Поле {} должно содержать JSON'
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    def handle_raw_input(self, input_data, meta, content_length, boundary,
+                         encoding=None):
+        if content_length > (
+            settings.RECIPE_IMAGE_MAX_SIZE
+            + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        ):
+            raise MultiPartParserError(
+                TOO_LARGE.format(settings.RECIPE_IMAGE_MAX_SIZE)
+            )
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.file.close()
+            raise MultiPartParserError(
+                TOO_LARGE.format(settings.RECIPE_IMAGE_MAX_SIZE)
+            )
+        return super().receive_data_chunk(raw_data, start)
+
+
+class MultiPartJSONParser(MultiPartParser):
+    json_fields = ('ingredients', 'tags')
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        result = super().parse(stream, media_type, parser_context)
+        data = result.data.dict()
+        for field in self.json_fields:
+            values = result.data.getlist(field)
+            if not values:
+                continue
+            try:
+                values = [json.loads(value) for value in values]
+            except ValueError:
+                raise ParseError(INVALID_JSON.format(field))
+            if len(values) == 1 and isinstance(values[0], list):
+                data[field] = values[0]
+            else:
+                data[field] = values
+        data.update(result.files.dict())
+        return DataAndFiles(data, MultiValueDict())
@@ -0,0 +1,91 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test import RequestFactory
+
+from recipes.models import (Cart, Favorite, FeedItem, IngredientRecipe,
+                            Recipe, Subscribe)
+from . import feed
+from .filters import RecipeFilter
+
+LARGE_TABLES = (
+    Recipe._meta.db_table,
+    IngredientRecipe._meta.db_table,
+    Recipe.tags.through._meta.db_table,
+    Favorite._meta.db_table,
+    Cart._meta.db_table,
+    Subscribe._meta.db_table,
+    FeedItem._meta.db_table,
+)
+PAGE_SIZE = 6
+SCANS = {
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+def is_supported():
+    return connection.vendor in SCANS
+
+
+@contextmanager
+def index_scans_only():
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+        try:
+            yield
+        finally:
+            cursor.execute('RESET enable_seqscan')
+
+
+def get_sequential_scans(plan):
+    return sorted(
+        set(SCANS[connection.vendor].findall(plan)) & set(LARGE_TABLES)
+    )
+
+
+def filter_recipes(user, data, ordering=('-pub_date', '-id')):
+    request = RequestFactory().get('/', data)
+    request.user = user
+    return RecipeFilter(
+        request.GET,
+        queryset=Recipe.objects.with_user_flags(user).order_by(*ordering),
+        request=request
+    ).qs[:PAGE_SIZE]
+
+
+def get_queries(user, author, tag):
+    recipes = Recipe.objects.filter(author=author)
+    return (
+        ('recipes', filter_recipes(user, {})),
+        ('recipes by tag', filter_recipes(user, {'tags': tag})),
+        ('recipes by author', filter_recipes(user, {'author': author})),
+        ('recipes favorited', filter_recipes(user, {'is_favorited': 1})),
+        ('recipes in cart',
+         filter_recipes(user, {'is_in_shopping_cart': 1})),
+        ('recipes by popularity', filter_recipes(
+            user, {}, ('-favorites_count', '-id')
+        )),
+        ('recipe ingredients', IngredientRecipe.objects.filter(
+            recipe__in=recipes
+        )),
+        ('recipe tags', Recipe.tags.through.objects.filter(
+            recipe__in=recipes
+        )),
+        ('subscriptions', Subscribe.objects.filter(
+            user=user
+        ).order_by('-id')[:PAGE_SIZE]),
+        ('followers', Subscribe.objects.filter(
+            following_id=author
+        ).values('user_id')),
+        ('feed', FeedItem.objects.filter(user=user).order_by(
+            *feed.FEED_ORDERING
+        )[:PAGE_SIZE]),
+        ('author recipes', recipes.order_by(
+            *feed.RECIPE_ORDERING
+        )[:PAGE_SIZE]),
+    )
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import Http404
+from rest_framework.renderers import JSONRenderer
+
+from recipes.models import DataVersion, Ingredient, Tag
+from .autocomplete import NameIndex
+
+
+class ReferenceTable:
+    def __init__(self, name, model, fields, index_class=None):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.index_class = index_class
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.checked = 0
+
+    def load(self, generation):
+        rows = list(
+            self.model.objects.order_by('id').values(*self.fields)
+        )
+        rows_by_id = {row['id']: row for row in rows}
+        return {
+            'generation': generation,
+            'rows': rows_by_id,
+            'content': JSONRenderer().render(rows),
+            'index': self.index_class and self.index_class(rows_by_id),
+        }
+
+    def get_snapshot(self, force=False):
+        snapshot = self.snapshot
+        if (
+            not force and snapshot is not None
+            and time.monotonic() - self.checked
+            < settings.REFERENCE_CACHE_CHECK_INTERVAL
+        ):
+            return snapshot
+        with self.lock:
+            generation = DataVersion.get_version(self.name)
+            self.checked = time.monotonic()
+            if self.snapshot is None or (
+                self.snapshot['generation'] != generation
+            ):
+                self.snapshot = self.load(generation)
+            return self.snapshot
+
+    def invalidate(self):
+        self.snapshot = None
+
+    def bump(self):
+        DataVersion.bump(self.name)
+        self.invalidate()
+
+    def get_content(self):
+        return self.get_snapshot()['content']
+
+    def get_rows(self):
+        return self.get_snapshot()['rows']
+
+    def search(self, query):
+        return self.get_snapshot()['index'].search(
+            query, settings.REFERENCE_SEARCH_LIMIT
+        )
+
+    def get_row(self, pk):
+        rows = self.get_rows()
+        if pk not in rows:
+            rows = self.get_snapshot(force=True)['rows']
+        return rows.get(pk)
+
+    def get_missing(self, ids):
+        rows = self.get_rows()
+        missing = {pk for pk in ids if pk not in rows}
+        if not missing:
+            return missing
+        return missing - set(
+            self.model.objects.filter(id__in=missing).values_list(
+                'id', flat=True
+            )
+        )
+
+    def get_row_or_404(self, pk):
+        row = self.get_row(pk)
+        if row is None:
+            raise Http404
+        return row
+
+
+tags = ReferenceTable('tags', Tag, ('id', 'name', 'color', 'slug'))
+ingredients = ReferenceTable(
+    'ingredients', Ingredient, ('id', 'name', 'measurement_unit'),
+    index_class=NameIndex
+)
+
+
+def warm_up():
+    try:
+        tags.get_snapshot()
+        ingredients.get_snapshot()
+    except DatabaseError:
+        pass
@@ -0,0 +1,41 @@
+from rest_framework.renderers import BaseRenderer
+
+from .shopping_list import render_csv, render_json, render_pdf, render_text
+
+
+class ShoppingListRenderer(BaseRenderer):
+    stream = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b''.join(self.stream(data))
+
+    def get_content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+
+class PDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+    stream = staticmethod(render_pdf)
+
+
+class TextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    stream = staticmethod(render_text)
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    stream = staticmethod(render_csv)
+
+
+class ShoppingListJSONRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    stream = staticmethod(render_json)
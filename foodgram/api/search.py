@@ -0,0 +1,150 @@
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+import snowballstemmer
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, connections
+from django.db.models import Case, F, FloatField, Value, When
+
+from recipes.models import IngredientRecipe, Recipe
+from . import reference
+from .autocomplete import normalize
+from .cache import RECIPES_VERSION_KEY, get_version
+
+CONFIG = 'russian'
+WEIGHTS = (1.0, 0.4, 0.2)
+WORD = re.compile(r'\w+')
+STOP_WORDS = frozenset((
+    'и', 'в', 'во', 'не', 'на', 'с', 'со', 'по', 'к', 'ко', 'из', 'у',
+    'о', 'об', 'от', 'до', 'для', 'за', 'а', 'но', 'или', 'же', 'бы',
+))
+UPDATE_VECTORS = f'''
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector('{CONFIG}', recipe.name), 'A') ||
+        setweight(to_tsvector('{CONFIG}', recipe.text), 'B') ||
+        setweight(to_tsvector('{CONFIG}', COALESCE((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_ingredientrecipe AS link
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = link.ingredient_id
+            WHERE link.recipe_id = recipe.id
+        ), '')), 'C')
+'''
+STEM_CACHE_SIZE = 100000
+
+
+def is_postgresql(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    return snowballstemmer.stemmer(CONFIG).stemWord(word)
+
+
+def tokenize(value):
+    return [
+        stem(word) for word in WORD.findall(normalize(value))
+        if word not in STOP_WORDS
+    ]
+
+
+def get_documents():
+    names = defaultdict(list)
+    rows = reference.ingredients.get_rows()
+    for recipe_id, ingredient_id in IngredientRecipe.objects.values_list(
+        'recipe_id', 'ingredient_id'
+    ).iterator():
+        if ingredient_id in rows:
+            names[recipe_id].append(rows[ingredient_id]['name'])
+    for recipe_id, name, text in Recipe.objects.values_list(
+        'id', 'name', 'text'
+    ).iterator():
+        yield recipe_id, (name, text, ' '.join(names[recipe_id]))
+
+
+class InvertedIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.postings = None
+
+    def load(self):
+        postings = defaultdict(lambda: defaultdict(float))
+        for recipe_id, fields in get_documents():
+            for weight, value in zip(WEIGHTS, fields):
+                for term in tokenize(value):
+                    postings[term][recipe_id] += weight
+        return postings
+
+    def get_postings(self):
+        version = (
+            get_version(RECIPES_VERSION_KEY),
+            reference.ingredients.get_snapshot()['generation']
+        )
+        with self.lock:
+            if self.version != version:
+                self.postings = self.load()
+                self.version = version
+            return self.postings
+
+    def search(self, query, limit):
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        postings = self.get_postings()
+        matches = [postings.get(term, {}) for term in set(terms)]
+        scores = dict.fromkeys(min(matches, key=len), 0.0)
+        for match in matches:
+            scores = {
+                recipe_id: score + match[recipe_id]
+                for recipe_id, score in scores.items()
+                if recipe_id in match
+            }
+        buckets = defaultdict(list)
+        for recipe_id, score in scores.items():
+            buckets[score].append(recipe_id)
+        ranked = {}
+        for score in sorted(buckets, reverse=True):
+            ranked[score] = sorted(buckets[score], reverse=True)[:limit]
+            limit -= len(ranked[score])
+            if not limit:
+                break
+        return ranked
+
+
+index = InvertedIndex()
+
+
+def search(queryset, query):
+    if is_postgresql(queryset.db):
+        query = SearchQuery(query, config=CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        )
+    ranked = index.search(query, settings.SEARCH_FALLBACK_LIMIT)
+    return queryset.filter(
+        id__in=[pk for ids in ranked.values() for pk in ids]
+    ).annotate(rank=Case(
+        *(
+            When(id__in=ids, then=Value(score))
+            for score, ids in ranked.items()
+        ),
+        default=Value(0.0),
+        output_field=FloatField()
+    ))
+
+
+def update_vectors(recipe_id=None):
+    if not is_postgresql():
+        return
+    with connection.cursor() as cursor:
+        if recipe_id is None:
+            cursor.execute(UPDATE_VECTORS)
+        else:
+            cursor.execute(
+                f'{UPDATE_VECTORS} WHERE recipe.id = %s', [recipe_id]
+            )
@@ -1,14 +1,16 @@
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from django.forms import ValidationError
 from djoser.serializers import UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
-from rest_framework.generics import get_object_or_404
 from rest_framework.serializers import SerializerMethodField
 
 from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
                             Recipe, Subscribe, Tag, TagRecipe)
 from users.models import User
+from . import images, reference
+from .fields import RecipeImageField
 
 NO_INGREDIENTS = 'Должен быть хотя бы один ингридиент'
 REPEAT_TAG = 'Не может быть одинаковых тегов'
@@ -20,6 +22,8 @@ UNACCEPTABLE_COOKING_TIME = 'Время приготовления должно
 UNACCEPTABLE_AMOUNT = 'Колличество ингредиента должно быть больше 0'
 ALLREADY_IN_CART = 'Этот тавар уже есть у Вас в корзине'
 ALREADY_FAVORITE = 'Этот рецепт уже добавлен в избранное'
+UNKNOWN_TAGS = 'Теги не найдены: {}'
+UNKNOWN_INGREDIENTS = 'Ингредиенты не найдены: {}'
 
 
 class CustomUserSerializer(UserSerializer):
@@ -34,6 +38,8 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -125,6 +131,7 @@ class RecipeGetSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -132,10 +139,17 @@ class RecipeGetSerializer(serializers.ModelSerializer):
             'id', 'tags', 'author',
             'ingredients', 'is_favorited',
             'is_in_shopping_cart', 'name',
-            'image', 'text', 'cooking_time',
+            'image', 'image_variants', 'text', 'cooking_time',
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
@@ -143,28 +157,30 @@ class RecipeGetSerializer(serializers.ModelSerializer):
         return Favorite.objects.filter(recipe=obj, user=user).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
-        user = request.user
         if request is None or request.user.is_anonymous:
             return False
+        user = request.user
         return Cart.objects.filter(recipe=obj, user=user).exists()
 
+    def get_image_variants(self, obj):
+        return images.get_variant_urls(obj, self.context.get('request'))
+
 
 class RecipePostSerializer(serializers.ModelSerializer):
     ingredients = IngredientInRecipePostSerializer(many=True)
-    tags = serializers.ListField(
-        child=serializers.SlugRelatedField(
-            slug_field='id', queryset=Tag.objects.all()
-        )
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     author = serializers.HiddenField(
         default=serializers.CurrentUserDefault()
     )
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
         fields = '__all__'
+        read_only_fields = ('favorites_count', 'in_carts_count')
 
     def validate(self, attrs):
         if len(attrs['ingredients']) == 0:
@@ -182,47 +198,104 @@ class RecipePostSerializer(serializers.ModelSerializer):
             id_ingredients.append(ingredient['id'])
         if len(id_ingredients) > len(set(id_ingredients)):
             raise ValidationError(REPEAT_INGREDIENTS)
+        for table, ids, message in (
+            (reference.tags, attrs['tags'], UNKNOWN_TAGS),
+            (reference.ingredients, id_ingredients, UNKNOWN_INGREDIENTS),
+        ):
+            missing = table.get_missing(ids)
+            if missing:
+                raise ValidationError(
+                    message.format(', '.join(map(str, sorted(missing))))
+                )
         return attrs
 
     def create_tag(self, tags, recipe):
         TagRecipe.objects.bulk_create(
-            [
-                TagRecipe(
-                    tag=get_object_or_404(Tag, id=tag.id),
-                    recipe=recipe
-                )
-                for tag in tags
-            ]
+            [TagRecipe(tag_id=tag, recipe=recipe) for tag in tags]
         )
 
     def create_ingredient(self, ingredients, recipe):
         IngredientRecipe.objects.bulk_create(
             [
                 IngredientRecipe(
-                    ingredient=get_object_or_404(
-                        Ingredient, id=ingredient.get('id')
-                    ),
-                    amount=ingredient.get('amount'),
+                    ingredient_id=ingredient['id'],
+                    amount=ingredient['amount'],
                     recipe=recipe
                 )
                 for ingredient in ingredients
             ]
         )
 
+    def update_tag(self, tags, recipe):
+        current = set(
+            TagRecipe.objects.filter(recipe=recipe).values_list(
+                'tag_id', flat=True
+            )
+        )
+        removed = current - set(tags)
+        if removed:
+            TagRecipe.objects.filter(
+                recipe=recipe, tag_id__in=removed
+            ).delete()
+        self.create_tag([tag for tag in tags if tag not in current], recipe)
+
+    def update_ingredient(self, ingredients, recipe):
+        current = {
+            amount.ingredient_id: amount
+            for amount in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, amount in current.items():
+            if ingredient_id in amounts and (
+                amount.amount != amounts[ingredient_id]
+            ):
+                amount.amount = amounts[ingredient_id]
+                changed.append(amount)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        self.create_ingredient(
+            [
+                ingredient for ingredient in ingredients
+                if ingredient['id'] not in current
+            ],
+            recipe
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         self.create_tag(tags, recipe)
         self.create_ingredient(ingredients, recipe)
+        images.schedule(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        TagRecipe.objects.filter(recipe=instance).delete()
-        self.create_ingredient(validated_data.pop('ingredients'), instance)
-        self.create_tag(validated_data.pop('tags'), instance)
-        return super().update(instance, validated_data)
+        self.update_ingredient(validated_data.pop('ingredients'), instance)
+        self.update_tag(validated_data.pop('tags'), instance)
+        previous_image = instance.image.name
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, 'update_date'])
+        if instance.image.name != previous_image:
+            Recipe.objects.filter(id=instance.id).update(
+                has_image_variants=False
+            )
+            instance.has_image_variants = False
+            images.schedule_release(previous_image)
+            images.schedule(instance)
+        return instance
 
     def to_representation(self, instance):
         context = {'request': self.context.get('request')}
@@ -230,13 +303,41 @@ class RecipePostSerializer(serializers.ModelSerializer):
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
         fields = (
             'id', 'name',
-            'image', 'cooking_time',
+            'image', 'image_variants', 'cooking_time',
         )
 
+    def get_image_variants(self, obj):
+        return images.get_variant_urls(obj, self.context.get('request'))
+
+
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit', '')
+    if not recipes_limit.isdigit():
+        return None
+    return int(recipes_limit)
+
+
+class SubscriptionListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        subscriptions = list(data)
+        recipes = {}
+        for recipe in Recipe.objects.only(
+            'id', 'name', 'image', 'has_image_variants', 'cooking_time',
+            'author', 'pub_date'
+        ).latest_by_author(
+            [subscription.following_id for subscription in subscriptions],
+            get_recipes_limit(self.context['request'])
+        ):
+            recipes.setdefault(recipe.author_id, []).append(recipe)
+        self.context['recipes'] = recipes
+        return super().to_representation(subscriptions)
+
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     email = serializers.CharField(
@@ -261,10 +362,11 @@ class SubscriptionSerializer(serializers.ModelSerializer):
     )
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='author.recipes.count')
+    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Subscribe
+        list_serializer_class = SubscriptionListSerializer
         fields = (
             'email', 'id',
             'username', 'first_name',
@@ -273,47 +375,54 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         )
 
     def validate(self, attrs):
-        user = get_object_or_404(User, id=self.context['request'].user.id)
-        following = get_object_or_404(User, id=self.context['following_id'])
-        if user == following:
+        if self.context['following'].id == self.context['request'].user.id:
             raise ValidationError(CANT_SUBSCRIBE_TO_YOURSELF)
-        if Subscribe.objects.filter(user=user, following=following).exists():
-            raise ValidationError(ALREADY_SIGNED)
         return attrs
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
+        if obj.user_id == request.user.id:
+            return True
         return Subscribe.objects.filter(
             user=request.user, following=obj.following
         ).exists()
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        queryset = Recipe.objects.filter(author=obj.following)
-        recipes_limit = request.query_params.get('recipe_limit')
-        if recipes_limit:
-            queryset = queryset[:int(recipes_limit)]
+        if 'recipes' in self.context:
+            queryset = self.context['recipes'].get(obj.following_id, [])
+        else:
+            queryset = Recipe.objects.filter(
+                author=obj.following
+            ).order_by('-pub_date', '-id')
+            recipes_limit = get_recipes_limit(self.context['request'])
+            if recipes_limit is not None:
+                queryset = queryset[:recipes_limit]
         return ShortRecipeSerializer(queryset, many=True).data
 
+    def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        return obj.following.recipes.count()
+
 
 class FavoriteSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(
-        source='favorite_recipe.id',
+        source='recipe.id',
         read_only=True
     )
     name = serializers.CharField(
-        source='favorite_recipe.name',
+        source='recipe.name',
         read_only=True
     )
     cooking_time = serializers.IntegerField(
-        source='favorite_recipe.cooking_time',
+        source='recipe.cooking_time',
         read_only=True
 
     )
     image = serializers.CharField(
-        source='favorite_recipe.image',
+        source='recipe.image',
         read_only=True
     )
 
@@ -324,14 +433,6 @@ class FavoriteSerializer(serializers.ModelSerializer):
             'cooking_time', 'image'
         )
 
-    def validate(self, attrs):
-        if Favorite.objects.filter(
-            user=get_object_or_404(User, id=self.context['request'].user.id),
-            recipe=get_object_or_404(Recipe, id=self.context['recipe_id'])
-        ):
-            raise ValidationError(ALREADY_FAVORITE)
-        return attrs
-
 
 class CartSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(
@@ -358,12 +459,10 @@ class CartSerializer(serializers.ModelSerializer):
             'image', 'cooking_time',
         )
 
-    def validate(self, attrs):
-        if Cart.objects.filter(
-                user=get_object_or_404(
-                    User, id=self.context['request'].user.id
-                ),
-                recipe=get_object_or_404(Recipe, id=self.context['recipe_id'])
-        ).exists():
-            raise serializers.ValidationError(ALLREADY_IN_CART)
-        return attrs
+
+class RecipeBatchSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPES_BATCH_SIZE
+    )
@@ -0,0 +1,140 @@
+import csv
+import hashlib
+import json
+import os
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.models import Cart, IngredientRecipe
+from . import reference
+
+FONT_NAME = 'KawashiroGothic'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'data/KawashiroGothic.ttf')
+TITLE = 'Корзина'
+TITLE_SIZE = 18
+LINE_SIZE = 14
+LINE_HEIGHT = 20
+TOP = 800
+BOTTOM = 40
+CSV_HEADER = ('name', 'measurement_unit', 'amount')
+CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024
+ARTIFACT_KEY = 'shopping_list:{}'
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def get_shopping_list(user):
+    return IngredientRecipe.objects.filter(
+        recipe__recipe_in_cart__user=user
+    ).values('ingredient__id').annotate(quantity=Sum('amount')).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'quantity'
+    ).order_by('ingredient__name', 'ingredient__measurement_unit').iterator()
+
+
+def get_cart_digest(user, format):
+    cart = Cart.objects.filter(user=user).order_by('recipe_id').values_list(
+        'recipe_id', 'recipe__update_date'
+    )
+    digest = hashlib.sha1(
+        f'{format}:{reference.ingredients.get_snapshot()["generation"]}'
+        .encode()
+    )
+    for recipe_id, update_date in cart:
+        digest.update(f';{recipe_id}:{update_date.isoformat()}'.encode())
+    return digest.hexdigest()
+
+
+def get_artifact(digest):
+    return cache.get(ARTIFACT_KEY.format(digest))
+
+
+def cache_artifact(digest, chunks):
+    content = []
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        if size <= settings.SHOPPING_LIST_CACHE_MAX_SIZE:
+            content.append(chunk)
+        yield chunk
+    if size <= settings.SHOPPING_LIST_CACHE_MAX_SIZE:
+        cache.set(
+            ARTIFACT_KEY.format(digest),
+            b''.join(content),
+            settings.SHOPPING_LIST_CACHE_TIMEOUT
+        )
+
+
+def draw_pdf(page, shopping_list):
+    page.setFont(FONT_NAME, size=TITLE_SIZE)
+    page.drawString(250, TOP, TITLE)
+    page.setFont(FONT_NAME, size=LINE_SIZE)
+    height = TOP - 30
+    for i, (name, measurement_unit, quantity) in enumerate(
+        shopping_list, start=1
+    ):
+        if height < BOTTOM:
+            page.showPage()
+            page.setFont(FONT_NAME, size=LINE_SIZE)
+            height = TOP
+        page.drawString(
+            70, height, f'{i}. {name} - {quantity} {measurement_unit}'
+        )
+        height -= LINE_HEIGHT
+    page.drawString(0, height - 10, 200 * '_')
+    page.showPage()
+    page.save()
+
+
+def render_pdf(shopping_list):
+    register_font()
+    with SpooledTemporaryFile(max_size=SPOOL_SIZE) as buffer:
+        draw_pdf(canvas.Canvas(buffer, pagesize=A4), shopping_list)
+        buffer.seek(0)
+        chunk = buffer.read(CHUNK_SIZE)
+        while chunk:
+            yield chunk
+            chunk = buffer.read(CHUNK_SIZE)
+
+
+def render_text(shopping_list):
+    yield f'{TITLE}\n\n'.encode()
+    for i, (name, measurement_unit, quantity) in enumerate(
+        shopping_list, start=1
+    ):
+        yield f'{i}. {name} - {quantity} {measurement_unit}\n'.encode()
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(shopping_list):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER).encode()
+    for row in shopping_list:
+        yield writer.writerow(row).encode()
+
+
+def render_json(shopping_list):
+    separator = '['
+    for row in shopping_list:
+        yield (
+            separator + json.dumps(
+                dict(zip(CSV_HEADER, row)), ensure_ascii=False
+            )
+        ).encode()
+        separator = ','
+    yield ('[]' if separator == '[' else ']').encode()
@@ -0,0 +1,116 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
+                            Recipe, Subscribe, Tag, TagRecipe)
+from users.models import User
+from . import feed, images, reference, search
+from .cache import bump_recipes_version, bump_user_version
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+COUNTERS = {Favorite: 'favorites_count', Cart: 'in_carts_count'}
+
+counters = threading.local()
+
+
+@contextmanager
+def counters_muted():
+    counters.muted = True
+    try:
+        yield
+    finally:
+        counters.muted = False
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+@receiver(post_save, sender=TagRecipe)
+@receiver(post_delete, sender=TagRecipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_recipes(sender, **kwargs):
+    bump_recipes_version()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authors(sender, update_fields=None, **kwargs):
+    if update_fields is None or AUTHOR_FIELDS & set(update_fields):
+        bump_recipes_version()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def invalidate_user_flags(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(id=instance.recipe_id).change_counter(
+            COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def decrement_counter(sender, instance, **kwargs):
+    if getattr(counters, 'muted', False):
+        return
+    Recipe.objects.filter(id=instance.recipe_id).change_counter(
+        COUNTERS[sender], -1
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    reference.tags.bump()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    reference.ingredients.bump()
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search.update_vectors(instance.id))
+
+
+@receiver(post_save, sender=Subscribe)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance)
+
+
+@receiver(post_delete, sender=Subscribe)
+def remove_from_feed(sender, instance, **kwargs):
+    feed.remove(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image(sender, instance, **kwargs):
+    if instance.image:
+        images.schedule_release(instance.image.name)
@@ -0,0 +1,58 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+URL = '/api/recipes/favorite/batch/'
+
+
+class FavoriteBatchTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@foodgram.local'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {i}', text='Описание',
+                image='seed.png', cooking_time=10
+            )
+            for i in range(3)
+        ]
+        Favorite.objects.create(
+            user=User.objects.create(
+                username='other', email='other@foodgram.local'
+            ),
+            recipe=cls.recipes[0]
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get_counters(self):
+        return list(Recipe.objects.order_by('id').values_list(
+            'favorites_count', flat=True
+        ))
+
+    def test_add_and_remove(self):
+        ids = [recipe.id for recipe in self.recipes]
+        response = self.client.post(
+            URL, {'recipes': ids[:2]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_counters(), [2, 1, 0])
+        response = self.client.delete(
+            URL, {'recipes': [ids[0], ids[2]]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recipes'], [
+            {'id': ids[0], 'status': 'removed'},
+            {'id': ids[2], 'status': 'not_found'},
+        ])
+        self.assertEqual(self.get_counters(), [1, 1, 0])
+        self.assertEqual(
+            list(Favorite.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )),
+            [ids[1]]
+        )
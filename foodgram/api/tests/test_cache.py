@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.cache import RECIPES_VERSION_KEY, get_version
+from recipes.models import Recipe
+from users.models import User
+
+
+class RecipesVersionTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(
+            username='author', email='author@foodgram.local'
+        )
+
+    def test_bumped_after_commit(self):
+        version = get_version(RECIPES_VERSION_KEY)
+        with transaction.atomic():
+            Recipe.objects.create(
+                author=self.author, name='Рецепт', text='Описание',
+                image='seed.png', cooking_time=10
+            )
+            self.assertEqual(get_version(RECIPES_VERSION_KEY), version)
+        self.assertNotEqual(get_version(RECIPES_VERSION_KEY), version)
+
+    def test_not_bumped_after_rollback(self):
+        version = get_version(RECIPES_VERSION_KEY)
+        with self.assertRaises(ZeroDivisionError):
+            with transaction.atomic():
+                Recipe.objects.create(
+                    author=self.author, name='Рецепт', text='Описание',
+                    image='seed.png', cooking_time=10
+                )
+                1 / 0
+        self.assertEqual(get_version(RECIPES_VERSION_KEY), version)
+
+    def test_detail_cached_per_scheme(self):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Описание',
+            image='seed.png', cooking_time=10
+        )
+        client = APIClient()
+        url = f'/api/recipes/{recipe.id}/'
+        self.assertTrue(
+            client.get(url).data['image'].startswith('http://')
+        )
+        self.assertTrue(
+            client.get(url, secure=True).data['image'].startswith('https://')
+        )
@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from recipes.models import FeedItem, Recipe, Subscribe
+from users.models import User
+
+URL = '/api/recipes/feed/?limit=10'
+
+
+@override_settings(FEED_FANOUT_LIMIT=1, FEED_SIZE=3)
+class FeedTest(APITestCase):
+    def setUp(self):
+        self.reader, self.other, self.author = [
+            User.objects.create(
+                username=name, email=f'{name}@foodgram.local'
+            )
+            for name in ('reader', 'other', 'author')
+        ]
+        self.client.force_authenticate(self.reader)
+
+    def publish(self, count):
+        return [
+            Recipe.objects.create(
+                author=self.author, name=f'Рецепт {i}', text='Описание',
+                image='seed.png', cooking_time=10
+            ).id
+            for i in range(count)
+        ]
+
+    def get_feed(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_fan_out_keeps_feed_size(self):
+        Subscribe.objects.create(user=self.reader, following=self.author)
+        recipes = self.publish(5)
+        self.assertEqual(FeedItem.objects.filter(user=self.reader).count(), 3)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get_feed(), recipes[:-4:-1])
+        self.assertFalse(any(
+            query['sql'].startswith('DELETE') for query in context
+        ))
+
+    def test_read_on_demand_after_followers_drop(self):
+        Subscribe.objects.create(user=self.reader, following=self.author)
+        Subscribe.objects.create(user=self.other, following=self.author)
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.feed_on_read)
+        recipes = self.publish(2)
+        self.assertFalse(FeedItem.objects.exists())
+        Subscribe.objects.filter(user=self.other).delete()
+        self.assertEqual(self.get_feed(), recipes[::-1])
@@ -0,0 +1,35 @@
+from rest_framework.test import APITestCase
+
+from api import reference
+from recipes.models import Ingredient
+
+URL = '/api/ingredients/'
+
+
+class IngredientSearchTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('соль', 'сахар', 'морская соль')
+        )
+
+    def setUp(self):
+        reference.ingredients.invalidate()
+
+    def get_names(self, params=None):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.json()]
+
+    def test_empty_name_lists_all(self):
+        names = ['соль', 'сахар', 'морская соль']
+        self.assertEqual(self.get_names(), names)
+        for name in ('', ' '):
+            with self.subTest(name=name):
+                self.assertEqual(self.get_names({'name': name}), names)
+
+    def test_prefix_first(self):
+        self.assertEqual(
+            self.get_names({'name': 'Сол'}), ['соль', 'морская соль']
+        )
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            Subscribe, Tag, TagRecipe)
+from users.models import User
+
+RECIPES = 40
+ANONYMOUS_QUERIES = 4
+AUTHENTICATED_QUERIES = 5
+
+
+class RecipeListQueriesTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@foodgram.local'
+        )
+        author = User.objects.create(
+            username='author', email='author@foodgram.local'
+        )
+        Subscribe.objects.create(user=cls.user, following=author)
+        tags = [
+            Tag.objects.create(name=f'Тег {i}', color=f'#00000{i}',
+                               slug=f'tag{i}')
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {i}', measurement_unit='г'
+            )
+            for i in range(5)
+        ]
+        for i in range(RECIPES):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {i}', text='Описание',
+                image='seed.png', cooking_time=10
+            )
+            TagRecipe.objects.bulk_create(
+                TagRecipe(tag=tag, recipe=recipe) for tag in tags[:i % 3 + 1]
+            )
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(ingredient=ingredient, recipe=recipe,
+                                 amount=i + 1)
+                for ingredient in ingredients
+            )
+            if i % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+        cls.token = Token.objects.create(user=cls.user)
+
+    def assert_page_queries(self, expected):
+        for limit in (6, 30):
+            cache.clear()
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(expected):
+                    response = self.client.get(f'/api/recipes/?limit={limit}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_page(self):
+        self.assert_page_queries(ANONYMOUS_QUERIES)
+
+    def test_authenticated_page(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assert_page_queries(AUTHENTICATED_QUERIES)
@@ -0,0 +1,36 @@
+from unittest import skipUnless
+
+from django.test import TestCase
+
+from api import plans
+from recipes.models import Cart, Recipe, Tag, TagRecipe
+from users.models import User
+
+
+@skipUnless(plans.is_supported(), 'EXPLAIN не разбирается для этой СУБД')
+class QueryPlansTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@foodgram.local'
+        )
+        cls.author = User.objects.create(
+            username='author', email='author@foodgram.local'
+        )
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            image='seed.png', cooking_time=10
+        )
+        TagRecipe.objects.create(tag=cls.tag, recipe=recipe)
+        Cart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_no_sequential_scans(self):
+        with plans.index_scans_only():
+            for name, queryset in plans.get_queries(
+                self.user, self.author.id, self.tag.slug
+            ):
+                with self.subTest(name):
+                    self.assertEqual(
+                        plans.get_sequential_scans(queryset.explain()), []
+                    )
@@ -0,0 +1,44 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Cart, Ingredient, IngredientRecipe, Recipe
+from users.models import User
+
+URL = '/api/recipes/download_shopping_cart/?format=json'
+
+
+class ShoppingListTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@foodgram.local'
+        )
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        salt_to_taste = Ingredient.objects.create(
+            name='соль', measurement_unit='по вкусу'
+        )
+        water = Ingredient.objects.create(name='вода', measurement_unit='мл')
+        for amounts in ((3, 1, 200), (2, 1, 100)):
+            recipe = Recipe.objects.create(
+                author=cls.user, name='Рецепт', text='Описание',
+                image='seed.png', cooking_time=10
+            )
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    ingredient=ingredient, recipe=recipe, amount=amount
+                )
+                for ingredient, amount in zip(
+                    (salt, salt_to_taste, water), amounts
+                )
+            )
+            Cart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_same_name_different_units(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            '[{"name": "вода", "measurement_unit": "мл", "amount": 300},'
+            '{"name": "соль", "measurement_unit": "г", "amount": 5},'
+            '{"name": "соль", "measurement_unit": "по вкусу", "amount": 2}]'
+        )
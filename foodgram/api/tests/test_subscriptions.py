@@ -0,0 +1,39 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe, Subscribe
+from users.models import User
+
+URL = '/api/users/subscriptions/?recipes_limit=3'
+RECIPES = 5
+
+
+class SubscriptionListTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@foodgram.local'
+        )
+        cls.author = User.objects.create(
+            username='author', email='author@foodgram.local'
+        )
+        for i in range(RECIPES):
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {i}', text='Описание',
+                image='seed.png', cooking_time=10
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_no_subscriptions(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+    def test_recipes_limit(self):
+        Subscribe.objects.create(user=self.user, following=self.author)
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        [subscription] = response.data['results']
+        self.assertEqual(len(subscription['recipes']), 3)
+        self.assertEqual(subscription['recipes_count'], RECIPES)
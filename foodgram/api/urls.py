@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CreateUserViewSet, SubscriptionListViewSet,
     TagViewSet, IngredientViewSet, RecipesViewSet, CartViewSet,
-    SubscriptionViewSet, DownloadCartViewSet, FavoriteViewSet
+    SubscriptionViewSet, DownloadCartViewSet, FavoriteViewSet,
+    FavoriteBatchViewSet, CartBatchViewSet
 )
 
 app_name = 'api'
@@ -35,6 +36,14 @@ urlpatterns = [
         'recipes/download_shopping_cart/',
         DownloadCartViewSet.as_view({'get': 'download_shopping_cart'}),
         name='download'),
+    path(
+        'recipes/favorite/batch/',
+        FavoriteBatchViewSet.as_view({'post': 'create', 'delete': 'destroy'}),
+        name='favorite_batch'),
+    path(
+        'recipes/shopping_cart/batch/',
+        CartBatchViewSet.as_view({'post': 'create', 'delete': 'destroy'}),
+        name='shopping_cart_batch'),
     path('', include(router_v1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
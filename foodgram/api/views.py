@@ -1,28 +1,41 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Count
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from djoser.serializers import SetPasswordSerializer
+from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import viewsets, status, mixins
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import ReadOnlyModelViewSet
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-
-from .filters import RecipeFilter, IngredientSearchFilter
-from .mixins import CreateDeleteMixins, CartFavorite
-from .pagination import RecipesSubscriptionsPagination
+
+from . import feed, reference
+from .filters import RecipeFilter, RecipeOrderingFilter
+from .mixins import (ConditionalGetMixin, CreateDeleteMixins, CartFavorite,
+                     CartFavoriteBatch, RecipeCacheMixin, ReferenceCacheMixin,
+                     delete_or_404, unique_or_error)
+from .pagination import (RecipesSubscriptionsPagination, decode_cursor,
+                         encode_cursor, get_ordering_fields)
+from .parsers import LimitedUploadHandler, MultiPartJSONParser
 from .permissions import AuthorAdminOrReadOnly
+from .renderers import (CSVRenderer, PDFRenderer, ShoppingListJSONRenderer,
+                        TextRenderer)
 from .serializers import (CustomUserSerializer, RegistrationSerializer,
                           TagSerializer, IngredientsSerializer,
                           RecipeGetSerializer, RecipePostSerializer,
                           SubscriptionSerializer, FavoriteSerializer,
-                          CartSerializer)
-from recipes.models import (Cart, Favorite, Ingredient,
-                            Recipe, Subscribe, Tag, IngredientRecipe)
+                          CartSerializer, ALLREADY_IN_CART, ALREADY_FAVORITE,
+                          ALREADY_SIGNED)
+from .shopping_list import (cache_artifact, get_artifact, get_cart_digest,
+                            get_shopping_list)
+from recipes.models import (Cart, Favorite, FeedItem, Ingredient,
+                            Recipe, Subscribe, Tag)
 from users.models import User
 
 
@@ -38,38 +51,103 @@ class CreateUserViewSet(UserViewSet):
         return User.objects.all()
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, ReferenceCacheMixin,
+                 ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
     queryset = Tag.objects.all()
+    reference = reference.tags
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, ReferenceCacheMixin,
+                        ReadOnlyModelViewSet):
     serializer_class = IngredientsSerializer
     permission_classes = [AllowAny]
+    reference = reference.ingredients
     queryset = Ingredient.objects.all()
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('name', '').strip():
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(self.search, request)
+
+    def search(self, request):
+        return Response(
+            self.reference.search(request.query_params['name'])
+        )
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipesViewSet(ConditionalGetMixin, RecipeCacheMixin,
+                     viewsets.ModelViewSet):
+    queryset = Recipe.objects.defer('search_vector').order_by(
+        '-pub_date', '-id'
+    )
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ('pub_date', 'favorites_count', 'in_carts_count')
+    ordering = ('-pub_date', '-id')
     pagination_class = RecipesSubscriptionsPagination
+    parser_classes = (JSONParser, MultiPartJSONParser)
     permission_classes = [AuthorAdminOrReadOnly]
+    related_actions = ('list', 'retrieve', 'feed')
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [LimitedUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset().with_user_flags(self.request.user)
+        if self.action not in self.related_actions:
+            return queryset
+        return queryset.with_related()
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeGetSerializer
         return RecipePostSerializer
 
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        cursor = request.query_params.get('cursor')
+        if not cursor:
+            position = None
+        else:
+            position = decode_cursor(cursor, get_ordering_fields(
+                FeedItem.objects.all(), feed.FEED_ORDERING
+            ))
+        size = self.paginator.get_page_size(request)
+        entries = feed.get_feed(request.user, position, size)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in entries]
+        )
+        next_url = None
+        if len(entries) == size:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), 'cursor',
+                encode_cursor(entries[-1])
+            )
+        return Response({
+            'next': next_url,
+            'results': self.get_serializer(
+                [
+                    recipes[recipe_id] for _, recipe_id in entries
+                    if recipe_id in recipes
+                ],
+                many=True
+            ).data,
+        })
+
 
 class SubscriptionListViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = SubscriptionSerializer
     pagination_class = RecipesSubscriptionsPagination
 
     def get_queryset(self):
-        return Subscribe.objects.filter(user=self.request.user)
+        return Subscribe.objects.filter(
+            user=self.request.user
+        ).select_related('following').annotate(
+            recipes_count=Count('following__recipes')
+        ).order_by('-id')
 
 
 class SubscriptionViewSet(CreateDeleteMixins, mixins.ListModelMixin):
@@ -77,28 +155,29 @@ class SubscriptionViewSet(CreateDeleteMixins, mixins.ListModelMixin):
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        context.update({'following_id': self.kwargs.get('users_id')})
+        context.update({'following': get_object_or_404(
+            User, id=self.kwargs.get('users_id')
+        )})
         return context
 
     def perform_create(self, serializer):
-        serializer.save(
-            user=self.request.user,
-            following=get_object_or_404(
-                User, id=self.kwargs.get('users_id')
-            ))
+        with unique_or_error(ALREADY_SIGNED):
+            serializer.save(
+                user=self.request.user,
+                following=serializer.context['following']
+            )
 
     def delete(self, request, users_id):
-        get_object_or_404(
-            Subscribe,
-            user=request.user,
-            following=users_id
-        ).delete()
+        delete_or_404(
+            Subscribe.objects.filter(user=request.user, following=users_id)
+        )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class FavoriteViewSet(CartFavorite, CreateDeleteMixins):
     serializer_class = FavoriteSerializer
     model = Favorite
+    already_added = ALREADY_FAVORITE
 
     def get_queryset(self):
         return Favorite.objects.filter(user=self.request.user)
@@ -108,47 +187,50 @@ class CartViewSet(CartFavorite, CreateDeleteMixins):
     queryset = Cart.objects.all()
     serializer_class = CartSerializer
     model = Cart
+    already_added = ALLREADY_IN_CART
+
+
+class FavoriteBatchViewSet(CartFavoriteBatch, viewsets.GenericViewSet):
+    model = Favorite
+    counter = 'favorites_count'
+
+
+class CartBatchViewSet(CartFavoriteBatch, viewsets.GenericViewSet):
+    model = Cart
+    counter = 'in_carts_count'
 
 
 class DownloadCartViewSet(viewsets.ModelViewSet):
+    renderer_classes = (PDFRenderer, TextRenderer, CSVRenderer,
+                        ShoppingListJSONRenderer)
+
+    def handle_exception(self, exc):
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
     def download_shopping_cart(self, request):
-        ingredients = (
-            IngredientRecipe.objects.filter(
-                recipe__recipe_in_cart__user=request.user
-            ).values('ingredient__id').
-            annotate(quantity=Sum('amount')).
-            values_list(
-                'ingredient__name', 'ingredient__measurement_unit',
-                'quantity'
+        renderer = request.accepted_renderer
+        digest = get_cart_digest(request.user, renderer.format)
+        etag = quote_etag(digest)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content = get_artifact(digest)
+            if content is None:
+                response = StreamingHttpResponse(
+                    cache_artifact(
+                        digest,
+                        renderer.stream(get_shopping_list(request.user))
+                    ),
+                    content_type=renderer.get_content_type()
+                )
+            else:
+                response = HttpResponse(
+                    content, content_type=renderer.get_content_type()
+                )
+            response['Content-Disposition'] = (
+                f'attachment; filename="shopping_cart.{renderer.format}"'
             )
-        )
-        shopping_cart = {}
-        for item in ingredients:
-            name = item[0]
-            if name not in shopping_cart:
-                shopping_cart[name] = {
-                    'measurement_unit': item[1],
-                    'quantity': item[2]
-                }
-        pdfmetrics.registerFont(
-            TTFont('KawashiroGothic', 'data/KawashiroGothic.ttf', 'UTF-8'))
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = (
-            'attachment; ''filename="shopping_cart.pdf"'
-        )
-        page = canvas.Canvas(response, pagesize=A4)
-        page.setFont('KawashiroGothic', size=18)
-        page.drawString(250, 800, 'Корзина')
-        page.setFont('KawashiroGothic', size=14)
-        height = 770
-        for i, (name, data) in enumerate(shopping_cart.items(), start=1):
-            if height > 20:
-                page.drawString(70, height, (
-                    f'{i}. {name} - {data["quantity"]} '
-                    f'{data["measurement_unit"]}'
-                ))
-                height -= 20
-        page.drawString(0, height - 10, 200 * '_')
-        page.showPage()
-        page.save()
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
         return response
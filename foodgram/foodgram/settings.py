@@ -28,11 +28,13 @@ INSTALLED_APPS = [
     'django_filters',
     'users',
     'recipes',
+    'api',
     'colorfield',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -41,6 +43,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', default=0))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'api.images': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -74,6 +98,53 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+RECIPES_CACHE_TIMEOUT = int(os.getenv('RECIPES_CACHE_TIMEOUT', default=300))
+
+RECIPES_MAX_AGE = int(os.getenv('RECIPES_MAX_AGE', default=60))
+
+REFERENCE_MAX_AGE = int(os.getenv('REFERENCE_MAX_AGE', default=600))
+
+REFERENCE_CACHE_CHECK_INTERVAL = int(
+    os.getenv('REFERENCE_CACHE_CHECK_INTERVAL', default=5)
+)
+
+REFERENCE_SEARCH_LIMIT = int(os.getenv('REFERENCE_SEARCH_LIMIT', default=50))
+
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', default=60 * 60)
+)
+
+SHOPPING_LIST_CACHE_MAX_SIZE = int(
+    os.getenv('SHOPPING_LIST_CACHE_MAX_SIZE', default=1024 * 1024)
+)
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=10 * 1024 * 1024)
+)
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', default=2))
+
+IMAGE_RELEASE_MIN_AGE = int(os.getenv('IMAGE_RELEASE_MIN_AGE', default=60))
+
+SEARCH_FALLBACK_LIMIT = int(os.getenv('SEARCH_FALLBACK_LIMIT', default=1000))
+
+RECIPES_BATCH_SIZE = int(os.getenv('RECIPES_BATCH_SIZE', default=100))
+
+FEED_SIZE = int(os.getenv('FEED_SIZE', default=500))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', default=1000))
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
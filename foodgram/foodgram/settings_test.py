@@ -0,0 +1,12 @@
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+if 'DB_ENGINE' not in os.environ:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        }
+    }
@@ -64,9 +64,10 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('name', 'author', 'tags')
     empty_value_display = 'пусто'
     list_filter = ('name', 'author', 'tags')
+    readonly_fields = ('favorites_count', 'in_carts_count')
 
     def count_favorite(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
 
 admin.site.register(Cart, CartAdmin)
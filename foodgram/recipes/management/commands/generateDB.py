@@ -0,0 +1,188 @@
+import random
+import time
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from recipes.models import (Cart, DataVersion, Favorite, Ingredient,
+                            IngredientRecipe, Recipe, Subscribe, Tag,
+                            TagRecipe)
+from users.models import User
+
+NO_INGREDIENTS = 'Сначала загрузите ингредиенты командой uploadDB'
+PASSWORD = 'foodgram-seed'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F2C94C', 'dessert'),
+    ('Перекус', '#56CCF2', 'snack'),
+)
+
+
+def zipf_weights(size, exponent):
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--subscriptions', type=int, default=10)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=3)
+        parser.add_argument('--exponent', type=float, default=1.1)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.options = options
+        self.total = 0
+        self.start = time.perf_counter()
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredients:
+            raise CommandError(NO_INGREDIENTS)
+        with transaction.atomic():
+            tags = self.create_tags()
+            users = self.create_users()
+            recipes = self.create_recipes(users)
+            self.insert(TagRecipe, self.tag_links(recipes, tags))
+            self.insert(
+                IngredientRecipe, self.ingredient_links(recipes, ingredients)
+            )
+            self.insert(Subscribe, self.subscriptions(users))
+            self.insert(Favorite, self.picks(
+                Favorite, users, recipes, options['favorites']
+            ))
+            self.insert(Cart, self.picks(
+                Cart, users, recipes, options['carts']
+            ))
+            DataVersion.bump('tags')
+            call_command('reconcileCounters', stdout=self.stdout)
+            call_command('rebuildSearchIndex', stdout=self.stdout)
+        cache.clear()
+        self.stdout.write(
+            f'Всего строк: {self.total}, '
+            f'{time.perf_counter() - self.start:.1f} с'
+        )
+
+    def insert(self, model, objects):
+        created = 0
+        objects = iter(objects)
+        batch = list(islice(objects, self.options['batch_size']))
+        while batch:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = list(islice(objects, self.options['batch_size']))
+        self.total += created
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {created} '
+            f'({time.perf_counter() - self.start:.1f} с)'
+        )
+
+    def new_ids(self, model, last_id):
+        return list(
+            model.objects.filter(id__gt=last_id or 0).order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def create_tags(self):
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_users(self):
+        last_id = User.objects.aggregate(last_id=Max('id'))['last_id']
+        prefix = f'seed{last_id or 0}_'
+        password = make_password(PASSWORD)
+        self.insert(User, (
+            User(
+                username=f'{prefix}{i}',
+                email=f'{prefix}{i}@foodgram.local',
+                first_name=f'Имя {i}',
+                last_name=f'Фамилия {i}',
+                password=password
+            )
+            for i in range(self.options['users'])
+        ))
+        users = self.new_ids(User, last_id)
+        self.random.shuffle(users)
+        return users
+
+    def create_recipes(self, users):
+        last_id = Recipe.objects.aggregate(last_id=Max('id'))['last_id']
+        authors = self.random.choices(
+            users,
+            cum_weights=zipf_weights(len(users), self.options['exponent']),
+            k=self.options['recipes']
+        )
+        self.insert(Recipe, (
+            Recipe(
+                author_id=author,
+                name=f'Рецепт {i}',
+                text=f'Описание рецепта {i}',
+                image='seed.png',
+                cooking_time=self.random.randint(5, 180)
+            )
+            for i, author in enumerate(authors)
+        ))
+        recipes = self.new_ids(Recipe, last_id)
+        self.random.shuffle(recipes)
+        return recipes
+
+    def tag_links(self, recipes, tags):
+        for recipe in recipes:
+            for tag in self.random.sample(
+                tags, self.random.randint(1, min(3, len(tags)))
+            ):
+                yield TagRecipe(tag_id=tag, recipe_id=recipe)
+
+    def ingredient_links(self, recipes, ingredients):
+        ingredients = ingredients[:]
+        self.random.shuffle(ingredients)
+        weights = zipf_weights(len(ingredients), self.options['exponent'])
+        limit = self.options['ingredients_per_recipe']
+        for recipe in recipes:
+            chosen = set(self.random.choices(
+                ingredients,
+                cum_weights=weights,
+                k=self.random.randint(1, 2 * limit - 1)
+            ))
+            for ingredient in chosen:
+                yield IngredientRecipe(
+                    ingredient_id=ingredient,
+                    recipe_id=recipe,
+                    amount=self.random.randint(1, 500)
+                )
+
+    def subscriptions(self, users):
+        weights = zipf_weights(len(users), self.options['exponent'])
+        limit = self.options['subscriptions']
+        for user in users:
+            following = set(self.random.choices(
+                users, cum_weights=weights,
+                k=self.random.randint(0, 2 * limit)
+            ))
+            following.discard(user)
+            for author in following:
+                yield Subscribe(user_id=user, following_id=author)
+
+    def picks(self, model, users, recipes, limit):
+        weights = zipf_weights(len(recipes), self.options['exponent'])
+        for user in users:
+            for recipe in set(self.random.choices(
+                recipes, cum_weights=weights,
+                k=self.random.randint(0, 2 * limit)
+            )):
+                yield model(user_id=user, recipe_id=recipe)
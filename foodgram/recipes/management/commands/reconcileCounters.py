@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Cart, Favorite, Recipe
+
+COUNTERS = (
+    ('favorites_count', Favorite),
+    ('in_carts_count', Cart),
+)
+
+
+def count_rows(model):
+    return Coalesce(Subquery(
+        model.objects.filter(recipe=OuterRef('pk')).order_by().values(
+            'recipe'
+        ).annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного и корзин у рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for field, model in COUNTERS:
+                drifted = list(
+                    Recipe.objects.annotate(
+                        actual=count_rows(model)
+                    ).exclude(**{field: F('actual')}).values_list(
+                        'id', flat=True
+                    )
+                )
+                if drifted and not options['dry_run']:
+                    Recipe.objects.filter(id__in=drifted).update(
+                        **{field: count_rows(model)}
+                    )
+                self.stdout.write(
+                    f'{Recipe._meta.get_field(field).verbose_name}: '
+                    f'расхождений {len(drifted)}'
+                )
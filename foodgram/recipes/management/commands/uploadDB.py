@@ -1,16 +1,55 @@
 import csv
+import json
 import os
+import time
 
-from django.core.management.base import BaseCommand
 from django.conf import settings
-from recipes.models import (Ingredient)
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from recipes.models import DataVersion, Ingredient
 
-def ingredient_create(row):
-    Ingredient.objects.get_or_create(
-        name=row[0],
-        measurement_unit=row[1]
-    )
+CSV_HEADER = ['name', 'measurement_unit']
+CHUNK_SIZE = 64 * 1024
+JSON_WHITESPACE = ' \t\r\n,'
+UNEXPECTED_END = 'Файл {} оборвался до конца списка'
+NOT_A_LIST = 'Файл {} должен содержать список ингредиентов'
+UNKNOWN_FORMAT = 'Неизвестный формат файла {}'
+
+
+def read_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if row != CSV_HEADER:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError(NOT_A_LIST.format(file.name))
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip(JSON_WHITESPACE)
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError(UNEXPECTED_END.format(file.name))
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
 
 
 class Command(BaseCommand):
@@ -20,12 +59,57 @@ class Command(BaseCommand):
             nargs='+',
             type=str
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true'
+        )
 
     def handle(self, *args, **options):
-        for filename in options['filename']:
-            path = os.path.join(settings.BASE_DIR, "data/") + filename
-            with open(path, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                next(reader)
-                for row in reader:
-                    ingredient_create(row)
+        seen = set()
+        with transaction.atomic():
+            for filename in options['filename']:
+                self.upload(filename, seen, options)
+            if not options['dry_run']:
+                DataVersion.bump('ingredients')
+
+    def upload(self, filename, seen, options):
+        path = os.path.join(settings.BASE_DIR, "data/") + filename
+        reader = READERS.get(os.path.splitext(filename)[1].lower())
+        if reader is None:
+            raise CommandError(UNKNOWN_FORMAT.format(filename))
+        start = time.perf_counter()
+        before = Ingredient.objects.count()
+        rows = 0
+        batch = []
+        with open(path, 'r', encoding='utf-8') as file:
+            for name, measurement_unit in reader(file):
+                rows += 1
+                key = (name.strip(), measurement_unit.strip())
+                if key in seen:
+                    continue
+                seen.add(key)
+                batch.append(
+                    Ingredient(name=key[0], measurement_unit=key[1])
+                )
+                if len(batch) >= options['batch_size']:
+                    self.write(batch, rows, options)
+                    batch = []
+        self.write(batch, rows, options)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{filename}: прочитано строк {rows}, '
+            f'добавлено {Ingredient.objects.count() - before}, '
+            f'{rows / max(elapsed, 1e-6):.0f} строк/с'
+            + (' (пробный запуск)' if options['dry_run'] else '')
+        )
+
+    def write(self, batch, rows, options):
+        if batch and not options['dry_run']:
+            Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        if options['verbosity'] > 1:
+            self.stdout.write(f'обработано строк: {rows}')
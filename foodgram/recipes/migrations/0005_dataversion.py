@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_auto_20220729_1629'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Название')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия данных',
+                'verbose_name_plural': 'Версии данных',
+            },
+        ),
+    ]
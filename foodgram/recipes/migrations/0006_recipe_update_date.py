@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='update_date',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+    ]
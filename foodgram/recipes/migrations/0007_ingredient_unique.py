@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:33
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(first=Min('id'), count=Count('id')).filter(count__gt=1)
+    for duplicate in duplicates:
+        others = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit']
+        ).exclude(id=duplicate['first'])
+        for amount in IngredientRecipe.objects.filter(ingredient__in=others):
+            if IngredientRecipe.objects.filter(
+                ingredient_id=duplicate['first'], recipe_id=amount.recipe_id
+            ).exists():
+                amount.delete()
+            else:
+                amount.ingredient_id = duplicate['first']
+                amount.save(update_fields=['ingredient'])
+        others.delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        # Отложенные проверки внешних ключей должны выполниться до
+        # ALTER TABLE в той же транзакции.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_update_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='уникальность ингредиента'),
+        ),
+    ]
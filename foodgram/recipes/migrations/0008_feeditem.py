@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_ingredient_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='recipes.Recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='уникальность рецепта в ленте'),
+        ),
+    ]
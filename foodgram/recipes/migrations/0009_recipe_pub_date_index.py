@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_feeditem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_idx'),
+        ),
+    ]
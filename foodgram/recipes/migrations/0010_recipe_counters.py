@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for field, model_name in (
+        ('favorites_count', 'Favorite'),
+        ('in_carts_count', 'Cart'),
+    ):
+        model = apps.get_model('recipes', model_name)
+        Recipe.objects.update(**{field: Coalesce(Subquery(
+            model.objects.filter(recipe=OuterRef('pk')).order_by().values(
+                'recipe'
+            ).annotate(total=Count('id')).values('total')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В корзинах'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', '-id'], name='recipe_favorites_count_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+TRIGRAM_INDEX = 'ingredient_name_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} '
+        'ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.AddIndex(
+            model_name='ingredientrecipe',
+            index=models.Index(fields=['recipe', 'ingredient'], name='ingredientrecipe_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscribe',
+            index=models.Index(fields=['following', 'user'], name='subscribe_following_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tagrecipe',
+            index=models.Index(fields=['recipe', 'tag'], name='tagrecipe_recipe_tag_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_index_pack'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='has_image_variants',
+            field=models.BooleanField(default=False, verbose_name='Уменьшенные копии готовы'),
+        ),
+    ]
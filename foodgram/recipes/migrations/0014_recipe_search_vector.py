@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:28
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = 'recipe_search_vector_idx'
+FILL_VECTORS = """
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector('russian', recipe.name), 'A') ||
+        setweight(to_tsvector('russian', recipe.text), 'B') ||
+        setweight(to_tsvector('russian', COALESCE((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_ingredientrecipe AS link
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = link.ingredient_id
+            WHERE link.recipe_id = recipe.id
+        ), '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(FILL_VECTORS)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} '
+        'ON recipes_recipe USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
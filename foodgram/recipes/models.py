@@ -1,8 +1,13 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import (BooleanField, Exists, F, OuterRef, Prefetch,
+                              Value, Window)
+from django.db.models.functions import Greatest, RowNumber
 from django.core.validators import MinValueValidator
 
 from users.models import User
+from .storage import ContentAddressedStorage
 
 
 class Ingredient(models.Model):
@@ -18,6 +23,12 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='уникальность ингредиента',
+            ),
+        ]
 
     def __str__(self):
         return(
@@ -53,6 +64,57 @@ class Tag(models.Model):
         )
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            Prefetch(
+                'ingredient',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            ),
+            'tags'
+        )
+
+    def latest_by_author(self, author_ids, limit=None):
+        if not author_ids:
+            return self.none()
+        queryset = self.filter(author__in=author_ids).order_by(
+            '-pub_date', '-id'
+        )
+        if limit is None:
+            return queryset
+        sql, params = queryset.annotate(row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('author')],
+            order_by=[F('pub_date').desc(), F('id').desc()]
+        )).query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s',
+            (*params, limit)
+        )
+
+    def change_counter(self, field, change):
+        return self.update(**{field: Greatest(F(field) + change, 0)})
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+                author_is_subscribed=Value(False, output_field=BooleanField())
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Cart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            author_is_subscribed=Exists(Subscribe.objects.filter(
+                user=user, following=OuterRef('author')
+            ))
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -65,7 +127,19 @@ class Recipe(models.Model):
         through='TagRecipe',
         verbose_name='Теги'
     )
-    image = models.ImageField(verbose_name='Изображение')
+    image = models.ImageField(
+        storage=ContentAddressedStorage(),
+        verbose_name='Изображение'
+    )
+    has_image_variants = models.BooleanField(
+        default=False,
+        verbose_name='Уменьшенные копии готовы'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
     ingredients = models.ManyToManyField(
         Ingredient,
         through='IngredientRecipe',
@@ -81,14 +155,42 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    update_date = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     cooking_time = models.IntegerField(
         validators=[MinValueValidator(1)],
         verbose_name='Время приготовки'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В корзинах'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-favorites_count', '-id'],
+                name='recipe_favorites_count_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -142,6 +244,12 @@ class Subscribe(models.Model):
                 name='уникальность подписки',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['following', 'user'],
+                name='subscribe_following_user_idx',
+            ),
+        ]
 
 
 class IngredientRecipe(models.Model):
@@ -172,6 +280,12 @@ class IngredientRecipe(models.Model):
                 name='уникальность ингредиента в рецепте',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient'],
+                name='ingredientrecipe_recipe_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.ingredient} in {self.recipe}, {self.amount}'
@@ -198,6 +312,12 @@ class TagRecipe(models.Model):
                 name='уникальность тега в рецепте',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'tag'],
+                name='tagrecipe_recipe_tag_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.recipe.name
@@ -225,3 +345,67 @@ class Favorite(models.Model):
                 name='уникальность избранного рецепта',
             ),
         ]
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='уникальность рецепта в ленте',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx',
+            ),
+        ]
+
+
+class DataVersion(models.Model):
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Название'
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Версия'
+    )
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
+
+    @classmethod
+    def get_version(cls, name):
+        return cls.objects.filter(name=name).values_list(
+            'version', flat=True
+        ).first() or 0
+
+    @classmethod
+    def bump(cls, name):
+        if not cls.objects.filter(name=name).update(
+            version=F('version') + 1
+        ):
+            cls.objects.get_or_create(name=name, defaults={'version': 1})
@@ -0,0 +1,33 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_PATH = '{}/{}{}'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        return BLOB_PATH.format(
+            digest[:2], digest, os.path.splitext(name)[1].lower()
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
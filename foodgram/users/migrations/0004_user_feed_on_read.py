@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def mark_feed_on_read(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscribe = apps.get_model('recipes', 'Subscribe')
+    User.objects.filter(
+        id__in=Subscribe.objects.values('following').annotate(
+            followers=Count('id')
+        ).filter(
+            followers__gt=settings.FEED_FANOUT_LIMIT
+        ).values('following')
+    ).update(feed_on_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_auto_20220729_1629'),
+        ('recipes', '0014_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_on_read',
+            field=models.BooleanField(default=False, verbose_name='Рецепты в ленты при чтении'),
+        ),
+        migrations.RunPython(mark_feed_on_read, migrations.RunPython.noop),
+    ]
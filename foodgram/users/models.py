@@ -21,6 +21,10 @@ class User(AbstractUser):
         max_length=150,
         verbose_name='Фамилия'
     )
+    feed_on_read = models.BooleanField(
+        default=False,
+        verbose_name='Рецепты в ленты при чтении'
+    )
 
     class Meta:
         verbose_name = 'Пользователь'